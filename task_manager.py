@@ -1,7 +1,7 @@
 """
 This program helps the user to manage tasks.
-Takes tasks.txt and user.txt as input files,
-If they don't exist, it creates them.
+Takes tasks.pkl and user.txt as input files,
+If they don't exist, it creates them (migrating tasks from an old tasks.txt file if found).
 The user has options such as:
     -Register a new user.
     -Add a new task.
@@ -17,11 +17,49 @@ The user has options such as:
 
 
 import os
-from datetime import datetime, date
+import pickle
+import shutil
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, date, timedelta
 from tabulate import tabulate
 
 DATETIME_STRING_FORMAT = "%d-%m-%Y"
 
+TASKS_FILE = "tasks.pkl"
+TASKS_TEMP_FILE = "tasks.pkl.tmp"
+TASKS_BACKUP_FILE = "tasks.pkl.bak"
+LEGACY_TASKS_FILE = "tasks.txt"
+TASK_RECORD_FIELDS = ("username", "title", "description", "due_date", "assigned_date", "completed")
+
+INVALID_OPTION_MESSAGE = "\033[91mInvalid option.\033[0m\n"
+INVALID_TASK_NUMBER_MESSAGE = "\033[91mInvalid task number.\033[0m\n"
+USER_NOT_FOUND_MESSAGE = "\033[91mUser does not exist.\033[0m\n"
+INVALID_DATE_FORMAT_MESSAGE = ("\033[91mInvalid date format. "
+                               "Please enter the date in the format DD-MM-YYYY.\033[0m\n")
+GOODBYE_MESSAGE = "\033[91mGoodbye!!!\033[0m\n"
+
+FLUSH_EDITED_TASKS_EVERY = 64
+
+_TASKS_CACHE = {"list": None, "by_user": None, "dirty": True, "pending_edits": 0, "version": 0}
+
+_STATS_CACHE = {"key": None, "stats": None}
+
+_TODAY_CACHE = {"date": None, "expires_at": 0.0}
+
+TASK_DRAFT_PROMPTS = {
+    "username": "Name of person assigned to task: ",
+    "title": "Title of Task: ",
+    "description": "Description of Task: ",
+    "due_date": "Due date of task (DD-MM-YYYY): ",
+}
+
+
+USER_INDEX = {}
+
+
 def create_user_file_if_not_found():
     """
     Create a user file if not found.
@@ -54,6 +92,25 @@ def read_users_file():
     return username_password
 
 
+def today():
+    """
+    Get the current date.
+    Calls date.today() only once per day, refreshing the cached date when
+    the local midnight it expires at has passed.
+    Parameters:    None
+    Returns:    date: The current date.
+    """
+
+
+    if time.time() >= _TODAY_CACHE["expires_at"]:
+        curr_date = date.today()
+        next_midnight = datetime.combine(curr_date + timedelta(days=1), datetime.min.time())
+        _TODAY_CACHE["date"] = curr_date
+        _TODAY_CACHE["expires_at"] = next_midnight.timestamp()
+
+    return _TODAY_CACHE["date"]
+
+
 def separate_line():
     """
     Print a separator line.
@@ -78,7 +135,7 @@ def initial_loggin(user, password):
 
     logged_in = False
 
-    username_password = read_users_file()
+    username_password = create_user_pass_dictionary()
 
     if user in username_password:
         if username_password[user] == password:
@@ -122,8 +179,7 @@ def validate_due_date_input():
             due_date_time = datetime.strptime(task_due_date_str, DATETIME_STRING_FORMAT)
             return due_date_time
         except ValueError:
-            print("\033[91mInvalid date format. "
-                  "Please enter the date in the format DD-MM-YYYY.\033[0m")
+            sys.stdout.write(INVALID_DATE_FORMAT_MESSAGE)
 
 
 def display_main_menu(curr_user):
@@ -183,14 +239,16 @@ def registration_user_option(new_user, username_password):
 def create_user_pass_dictionary():
     """
     Create a dictionary of usernames and passwords.
-    Reads the usernames and passwords from the user file and returns them as a dictionary.
+    Reads the usernames and passwords from the user file once and keeps them in USER_INDEX,
+    which is updated in place when new users are registered.
     Parameters:    None
     Returns:    dict: A dictionary containing usernames as keys and passwords as values.
     """
 
 
-    username_password = read_users_file()
-    return username_password
+    if not USER_INDEX:
+        USER_INDEX.update(read_users_file())
+    return USER_INDEX
 
 
 def add_new_user_to_user_file(username_password):
@@ -209,47 +267,146 @@ def add_new_user_to_user_file(username_password):
         out_file.write("\n".join(user_data))
 
 
+def read_legacy_tasks_file():
+    """
+    Read tasks data from the legacy tasks file.
+    Parses the ";" separated lines of the old "tasks.txt" file into task records.
+    Parameters:    None
+    Returns:    list: A list of dictionaries with the fields in TASK_RECORD_FIELDS.
+    """
+
+
+    task_data = []
+
+    with open(LEGACY_TASKS_FILE, 'r', encoding='utf-8') as task_file:
+        for line in task_file:
+            if not line.strip():
+                continue
+            task_components = line.rstrip("\n").split(";")
+            task_data.append({
+                'username': task_components[1],
+                'title': task_components[2],
+                'description': task_components[3],
+                'due_date': datetime.strptime(task_components[4], DATETIME_STRING_FORMAT),
+                'assigned_date': datetime.strptime(task_components[5], DATETIME_STRING_FORMAT),
+                'completed': task_components[6] == "Yes"
+            })
+
+    return task_data
+
+
 def read_tasks_file():
     """
     Read tasks data from the tasks file.
-    Reads the task data from the "tasks.txt" file.
+    Loads the pickled task records from the "tasks.pkl" file, one record per pickle frame.
+    If the last frame was cut off by an interrupted append, the file is copied to "tasks.pkl.bak"
+    and rewritten without it, so new tasks can be appended again.
+    Any other damage stops the program without changing the file.
+    If the file doesn't exist, migrates the old "tasks.txt" file or creates an empty file.
     Parameters:    None
-    Returns:    list: A list of task data.
+    Returns:    list: A list of dictionaries with the fields in TASK_RECORD_FIELDS.
     """
 
 
-    try:
-        with open("tasks.txt", 'r+', encoding='utf-8') as task_file:
-            task_data = task_file.read().split("\n")
-            task_data = [t.split(";") for t in task_data if t]
-    except FileNotFoundError:
-        with open("tasks.txt", 'w', encoding='utf-8') as task_file:
-            task_data = []
+    if not os.path.exists(TASKS_FILE):
+        task_data = read_legacy_tasks_file() if os.path.exists(LEGACY_TASKS_FILE) else []
+        write_new_task_to_tasks_file(task_data)
+        return task_data
+
+    task_data = []
+    cut_off_at = None
+
+    with open(TASKS_FILE, 'rb') as task_file:
+        file_size = os.fstat(task_file.fileno()).st_size
+        record_start = 0
+        while record_start < file_size:
+            try:
+                task_record = pickle.load(task_file)
+            except (EOFError, pickle.UnpicklingError) as error:
+                if task_file.tell() < file_size:
+                    stop_on_damaged_tasks_file(record_start, error)
+                cut_off_at = record_start
+                break
+            except Exception as error:
+                stop_on_damaged_tasks_file(record_start, error)
+            if not isinstance(task_record, dict):
+                stop_on_damaged_tasks_file(record_start, TypeError("the record is not a task"))
+            task_data.append(task_record)
+            record_start = task_file.tell()
+
+    if cut_off_at is not None:
+        shutil.copyfile(TASKS_FILE, TASKS_BACKUP_FILE)
+        write_new_task_to_tasks_file(task_data)
+        print(f"\033[91m{TASKS_FILE} ended with an incomplete task record: "
+              f"the last {file_size - cut_off_at} bytes were dropped and {len(task_data)} tasks were loaded. "
+              f"The original file was copied to {TASKS_BACKUP_FILE}.\033[0m")
 
     return task_data
 
 
+def stop_on_damaged_tasks_file(position, error):
+    """
+    Stop on a damaged tasks file.
+    Reports where the "tasks.pkl" file could not be loaded and exits without changing it.
+    Parameters:    position (int): The byte offset of the record that could not be loaded.
+        error (Exception): The error raised while loading the record.
+    Returns:    None
+    """
+
+
+    print(f"\033[91mError: {TASKS_FILE} is damaged at byte {position} and could not be loaded "
+          f"({error}). The file has not been changed.\033[0m")
+    sys.exit(1)
+
+
 def create_task_list(task_data):
     """
     Create a list of tasks.
-    Converts the task data into a list of dictionaries representing individual tasks.
-    Parameters:    task_data (list): A list of task data.
-    Returns:    list: A list of dictionaries representing tasks.
+    Numbers the loaded task records in place and groups them by the username
+    they are assigned to in the same pass.
+    Parameters:    task_data (list): A list of task records.
+    Returns:    tuple: A list of dictionaries representing tasks and
+        a defaultdict mapping each username to the list of its tasks.
     """
 
 
     task_list = []
-    for i, task_components in enumerate(task_data, start=1):
-        curr_t = {}
+    tasks_by_user = defaultdict(list)
+    for i, curr_t in enumerate(task_data, start=1):
         curr_t['number'] = i
-        curr_t['username'] = task_components[1]
-        curr_t['title'] = task_components[2]
-        curr_t['description'] = task_components[3]
-        curr_t['due_date'] = datetime.strptime(task_components[4], DATETIME_STRING_FORMAT)
-        curr_t['assigned_date'] = datetime.strptime(task_components[5], DATETIME_STRING_FORMAT)
-        curr_t['completed'] = True if task_components[6] == "Yes" else False
         task_list.append(curr_t)
-    return task_list
+        tasks_by_user[curr_t['username']].append(curr_t)
+    return task_list, tasks_by_user
+
+
+def get_task_list():
+    """
+    Get the cached list of tasks.
+    Reads and parses the tasks file only the first time it is needed; afterwards
+    the cached list is the source of truth and changes are written back from it.
+    Parameters:    None
+    Returns:    list: A list of dictionaries representing tasks.
+    """
+
+
+    if _TASKS_CACHE["dirty"]:
+        task_data = read_tasks_file()
+        _TASKS_CACHE["list"], _TASKS_CACHE["by_user"] = create_task_list(task_data)
+        _TASKS_CACHE["dirty"] = False
+
+    return _TASKS_CACHE["list"]
+
+
+def get_tasks_by_user():
+    """
+    Get the cached tasks grouped by username.
+    Parameters:    None
+    Returns:    defaultdict: A mapping of each username to the list of its tasks.
+    """
+
+
+    get_task_list()
+    return _TASKS_CACHE["by_user"]
 
 
 def assign_task_to_user(username):
@@ -261,7 +418,7 @@ def assign_task_to_user(username):
     """
 
 
-    username_password = read_users_file()
+    username_password = create_user_pass_dictionary()
 
     while username not in username_password:
         print("\033[91mUser doesn't exist.\033[0m")
@@ -279,24 +436,68 @@ def validate_if_username_registered(task_username, username_password):
 
 
     while True:
-        if task_username in username_password.keys():
+        if task_username in username_password:
             return task_username
         else:
-            print("\033[91mUser does not exist.\033[0m")
+            sys.stdout.write(USER_NOT_FOUND_MESSAGE)
 
         task_username = input("\033[91mPlease enter a username already registered: \033[0m")
 
 
-def add_new_task_to_task_list(task_list, task_username, task_title, task_description, due_date_time, curr_date):
+@dataclass
+class TaskDraft:
+    """
+    Task draft.
+    Holds the details of a new task as entered by the user, before they are validated.
+    """
+
+    username: str
+    title: str
+    description: str
+    due_date: str
+
+
+def validate_task_draft(draft, username_password):
+    """
+    Validate a task draft.
+    Checks every detail of a new task in one pass, so all the errors can be reported at once.
+    Parameters:    draft (TaskDraft): The details of the new task.
+        username_password (dict): A dictionary containing usernames as keys and passwords as values.
+    Returns:    tuple: A list of (field, message) tuples with colored messages ready to be written,
+        empty if the draft is valid, and the parsed due date (None if it is invalid).
+    """
+
+
+    errors = []
+    due_date_time = None
+
+    if draft.username not in username_password:
+        errors.append(("username", USER_NOT_FOUND_MESSAGE))
+    if not draft.title:
+        errors.append(("title", "\033[91mTitle of task can't be empty.\033[0m\n"))
+    if not draft.description:
+        errors.append(("description", "\033[91mDescription of task can't be empty.\033[0m\n"))
+    try:
+        due_date_time = datetime.strptime(draft.due_date, DATETIME_STRING_FORMAT)
+    except ValueError:
+        errors.append(("due_date", INVALID_DATE_FORMAT_MESSAGE))
+
+    return errors, due_date_time
+
+
+def add_new_task_to_task_list(task_list, task_username, task_title, task_description, due_date_time, curr_date,
+                              tasks_by_user=None):
     """
     Add a new task to the task list.
-    Creates a new task dictionary and appends it to the task list.
+    Creates a new task dictionary and appends it to the task list,
+    and to the tasks of its user if an index by username is given.
     Parameters:    task_list (list): A list of dictionaries representing tasks.
         task_username (str): The username of the user to whom the task is assigned.
         task_title (str): The title of the task.
         task_description (str): The description of the task.
         due_date_time (datetime): The due date and time of the task.
-        curr_date (date): The current date.
+        curr_date (datetime): Midnight of the current date, the same type as the loaded assigned dates.
+        tasks_by_user (defaultdict): A mapping of each username to the list of its tasks.
     Returns:    list: The updated task list.
     """
 
@@ -313,46 +514,86 @@ def add_new_task_to_task_list(task_list, task_username, task_title, task_descrip
         "completed": False
     }
     task_list.append(new_task)
+    if tasks_by_user is not None:
+        tasks_by_user[task_username].append(new_task)
+    _TASKS_CACHE["version"] += 1
 
     return task_list
 
 
+def task_to_record(task):
+    """
+    Convert a task to the record saved in the tasks file.
+    Parameters:    task (dict): A dictionary representing a task.
+    Returns:    dict: A dictionary with the fields in TASK_RECORD_FIELDS.
+    """
+
+
+    return {field: task[field] for field in TASK_RECORD_FIELDS}
+
+
 def write_new_task_to_tasks_file(task_list):
     """
-    Write new tasks to the tasks file.
-    Writes the updated list of tasks to the "tasks.txt" file.
+    Write all tasks to the tasks file.
+    Rewrites the "tasks.pkl" file with the whole list of tasks, saving the edited ones.
+    The records are written to a temporary file that then replaces "tasks.pkl",
+    so an interrupted write leaves the previous file intact.
     Parameters:    task_list (list): A list of dictionaries representing tasks.
     Returns:    None
     """
 
 
-    with open("tasks.txt", "w+", encoding='utf-8') as task_file:
-        for i, task in enumerate(task_list, start=1):
-            task_data = [
-                str(i),
-                task['username'],
-                task['title'],
-                task['description'],
-                task['due_date'].strftime(DATETIME_STRING_FORMAT),
-                task['assigned_date'].strftime(DATETIME_STRING_FORMAT),
-                "Yes" if task['completed'] else "No"
-            ]
-            task_file.write(";".join(task_data) + "\n")
+    with open(TASKS_TEMP_FILE, "wb") as task_file:
+        for task in task_list:
+            pickle.dump(task_to_record(task), task_file, protocol=5)
+        task_file.flush()
+        os.fsync(task_file.fileno())
 
-        print(f"\n\033[92mTask {i} successfully added to output file tasks.txt\033[0m\n")
+    os.replace(TASKS_TEMP_FILE, TASKS_FILE)
+
+    _TASKS_CACHE["pending_edits"] = 0
+
+
+def append_task_to_file(task):
+    """
+    Append a new task to the tasks file.
+    Writes only the record of the new task as a new pickle frame at the end of the "tasks.pkl" file.
+    Parameters:    task (dict): A dictionary representing the new task.
+    Returns:    None
+    """
+
+
+    with open(TASKS_FILE, "ab") as task_file:
+        pickle.dump(task_to_record(task), task_file, protocol=5)
+
+    print(f"\n\033[92mTask {task['number']} successfully added to output file {TASKS_FILE}\033[0m\n")
+
+
+def save_tasks_file():
+    """
+    Save pending changes to the tasks file.
+    Rewrites the "tasks.pkl" file in one pass if tasks were edited since the last rewrite;
+    new tasks are already on disk, since they are appended as they are added.
+    Parameters:    None
+    Returns:    None
+    """
+
+
+    if _TASKS_CACHE["pending_edits"]:
+        write_new_task_to_tasks_file(get_task_list())
 
 
 def create_tasks_file_if_not_found():
     """
     Create tasks file if not found.
-    If the "tasks.txt" file does not exist, create it.
+    If the "tasks.pkl" file does not exist, create it.
     Parameters:    None
     Returns:    None
     """
 
 
-    if not os.path.exists("tasks.txt"):
-        with open("tasks.txt", "w", encoding='utf-8'):
+    if not os.path.exists(TASKS_FILE):
+        with open(TASKS_FILE, "wb"):
             pass
 
 
@@ -399,143 +640,119 @@ def view_my_tasks_option(curr_user):
     """
 
 
-    task_data = read_tasks_file()
-    task_list = create_task_list(task_data)
-
-    found_tasks = False
-
-    my_task_list = []
+    my_task_list = get_tasks_by_user().get(curr_user, [])
 
     separate_line()
     print("\033[93mYour tasks:\033[0m")
     separate_line()
-    for i, task in enumerate(task_list, start=1):
-        if task['username'] == curr_user:
-            found_tasks = True
-            separate_line()
-            print(f"Task number:\t\t {task['number']}")
-            print(f"Task assigned to:\t {task['username']}")
-            print(f"Task title:\t\t {task['title']}")
-            print(f"Task description:\t {task['description']}")
-            print(f"Date assigned:\t\t {task['assigned_date'].strftime(DATETIME_STRING_FORMAT)}")
-            print(f"Due date:\t\t {task['due_date'].strftime(DATETIME_STRING_FORMAT)}")
-            print(f"Completed: \t\t {'Yes' if task['completed'] else 'No'}")
-            print()
-            task['task_number'] = i
-            my_task_list.append(task)
-
-    if not found_tasks:
+    for task in my_task_list:
+        separate_line()
+        print(f"Task number:\t\t {task['number']}")
+        print(f"Task assigned to:\t {task['username']}")
+        print(f"Task title:\t\t {task['title']}")
+        print(f"Task description:\t {task['description']}")
+        print(f"Date assigned:\t\t {task['assigned_date'].strftime(DATETIME_STRING_FORMAT)}")
+        print(f"Due date:\t\t {task['due_date'].strftime(DATETIME_STRING_FORMAT)}")
+        print(f"Completed: \t\t {'Yes' if task['completed'] else 'No'}")
+        print()
+
+    if not my_task_list:
         print("\033[91mNo tasks assigned to you.\033[0m")
 
     return my_task_list
 
 
-def edit_task_details(my_task_list, edit_specific_task):
+def edit_task_details(task_list, curr_user, edit_specific_task):
     """
     Edit task details.
     Allows the user to edit specific details of a task.
-    Parameters:    my_task_list (list): A list of dictionaries representing tasks assigned to the current user.
-    specific_task (str): The number of the specific task to be edited.
+    The task number is used directly as an offset into the task list.
+    Parameters:    task_list (list): A list of dictionaries representing tasks.
+    curr_user (str): The username of the current user, who must be assigned to the task.
+    edit_specific_task (str): The number of the specific task to be edited.
     Returns:    list: The updated list of tasks.
     """
 
 
     try:
-        edit_specific_task = int(edit_specific_task)
+        task_index = int(edit_specific_task) - 1
     except ValueError:
-        print("\033[91mInvalid task number.\033[0m")
-        return my_task_list
+        sys.stdout.write(INVALID_TASK_NUMBER_MESSAGE)
+        return task_list
 
-    task_found = False
+    if not 0 <= task_index < len(task_list) or task_list[task_index]['username'] != curr_user:
+        sys.stdout.write(INVALID_TASK_NUMBER_MESSAGE)
+        return task_list
 
-    for task in my_task_list:
-        if task['task_number'] == edit_specific_task:
-            task_found = True
-            separate_line()
-            print("\033[93mTask details:\033[0m")
-            separate_line()
-            print(f"Task number:\t\t {task['task_number']}")
-            print(f"Task assigned to:\t {task['username']}")
-            print(f"Title:\t\t\t {task['title']}")
-            print(f"Description:\t\t {task['description']}")
-            print(f"Due Date:\t\t {task['due_date'].strftime(DATETIME_STRING_FORMAT)}")
-            print(f"Assign date:\t\t {task['assigned_date'].strftime(DATETIME_STRING_FORMAT)}")
-            print(f"Completed:\t\t {'Yes' if task['completed'] else 'No'}")
-            print()
-
-            current_date = datetime.today()
-
-            if (task['completed'] is False) and (task['due_date'] > current_date):
-                display_edit_or_complete_menu()
-                field_to_edit = input("Please select an option: \n").lower()
-
-                if field_to_edit == 'u':
-                    username_password = read_users_file()
-                    new_username = validate_data_entry(input("Enter the new username: "))
-                    validate_if_username_registered(new_username, username_password)
-                    task['username'] = new_username
-                    print("\033[92mUsername successfully updated.\033[0m")
-                    update_tasks_file(task)
-
-                elif field_to_edit == 'd':
-                    new_due_date = validate_due_date_input()
-                    task['due_date'] = new_due_date
-                    print("\033[92mDue date successfully updated.\033[0m")
-                    update_tasks_file(task)
-
-                elif field_to_edit == 'c':
-                    new_completed = validate_data_entry(input("To change to completed enter 'Yes': ").lower())
-                    if new_completed == "yes":
-                        task['completed'] = True
-                        print("\033[92mComplete status successfully updated.\033[0m")
-                        update_tasks_file(task)
-                    else:
-                        print("\033[91mNo change made.\033[0m")
-
-                elif field_to_edit == 'e':
-                    break
+    task = task_list[task_index]
 
-                else:
-                    print("\033[91mInvalid option.\033[0m")
-                    return my_task_list
+    separate_line()
+    print("\033[93mTask details:\033[0m")
+    separate_line()
+    print(f"Task number:\t\t {task['number']}")
+    print(f"Task assigned to:\t {task['username']}")
+    print(f"Title:\t\t\t {task['title']}")
+    print(f"Description:\t\t {task['description']}")
+    print(f"Due Date:\t\t {task['due_date'].strftime(DATETIME_STRING_FORMAT)}")
+    print(f"Assign date:\t\t {task['assigned_date'].strftime(DATETIME_STRING_FORMAT)}")
+    print(f"Completed:\t\t {'Yes' if task['completed'] else 'No'}")
+    print()
+
+    current_date = datetime.combine(today(), datetime.min.time())
+
+    if (task['completed'] is False) and (task['due_date'] > current_date):
+        display_edit_or_complete_menu()
+        field_to_edit = input("Please select an option: \n").lower()
+
+        if field_to_edit == 'u':
+            username_password = create_user_pass_dictionary()
+            new_username = validate_data_entry(input("Enter the new username: "))
+            new_username = validate_if_username_registered(new_username, username_password)
+            if new_username != task['username']:
+                tasks_by_user = get_tasks_by_user()
+                tasks_by_user[task['username']].remove(task)
+                tasks_by_user[new_username].append(task)
+            task['username'] = new_username
+            print("\033[92mUsername successfully updated.\033[0m")
+            mark_task_as_edited(task)
+
+        elif field_to_edit == 'd':
+            new_due_date = validate_due_date_input()
+            task['due_date'] = new_due_date
+            print("\033[92mDue date successfully updated.\033[0m")
+            mark_task_as_edited(task)
+
+        elif field_to_edit == 'c':
+            new_completed = validate_data_entry(input("To change to completed enter 'Yes': ").lower())
+            if new_completed == "yes":
+                task['completed'] = True
+                print("\033[92mComplete status successfully updated.\033[0m")
+                mark_task_as_edited(task)
             else:
-                print("\033[91mTask completed or overdue, can't be edited.\033[0m")
-                break
+                print("\033[91mNo change made.\033[0m")
 
-    if not task_found:
-        print("\033[91mInvalid task number.\033[0m")
+        elif field_to_edit != 'e':
+            sys.stdout.write(INVALID_OPTION_MESSAGE)
+    else:
+        print("\033[91mTask completed or overdue, can't be edited.\033[0m")
 
-    return my_task_list
+    return task_list
 
 
-def update_tasks_file(specific_task):
+def mark_task_as_edited(task):
     """
-    Update tasks file with edited task details.
-    Updates the "tasks.txt" file with the edited details of a task.
-    Parameters:    specific_task (dict): A dictionary representing the specific task to be updated.
+    Mark a task as edited.
+    Counts the edit so the next save rewrites the tasks file with the task's new details;
+    that happens every FLUSH_EDITED_TASKS_EVERY edits or when the program exits.
+    Parameters:    task (dict): A dictionary representing the edited task.
     Returns:    None
     """
 
 
-    with open("tasks.txt", "r", encoding='utf-8') as file:
-        lines = file.readlines()
-
-    for i, line in enumerate(lines):
-        parts = line.split(";")
-        if parts[0].strip() == str(specific_task['number']):
-            lines[i] = (
-                f"{specific_task['number']};"
-                f"{specific_task['username']};"
-                f"{specific_task['title']};"
-                f"{specific_task['description']};"
-                f"{specific_task['due_date'].strftime(DATETIME_STRING_FORMAT)};"
-                f"{specific_task['assigned_date'].strftime(DATETIME_STRING_FORMAT)};"
-                f"{'Yes' if specific_task['completed'] else 'No'}\n"
-            )
-            break
-
-    with open("tasks.txt", "w", encoding='utf-8') as file:
-        file.writelines(lines)
+    _TASKS_CACHE["version"] += 1
+    _TASKS_CACHE["pending_edits"] += 1
+    if _TASKS_CACHE["pending_edits"] >= FLUSH_EDITED_TASKS_EVERY:
+        save_tasks_file()
 
 
 def display_edit_or_complete_menu():
@@ -557,61 +774,86 @@ def display_edit_or_complete_menu():
     print(tabulate(edit_options, headers=["Opcion", "Description"], tablefmt="grid"))
 
 
-def generate_reports_option():
+def calculate_task_statistics(task_list, username_password):
     """
-    Generate reports.
-    Generates reports based on task data and user statistics.
-    Parameters:    None
-    Returns:    None
+    Calculate task statistics.
+    Counts the tasks assigned, completed, uncompleted and overdue in total and per user,
+    using a Counter for each figure instead of updating nested dictionaries per task.
+    Parameters:    task_list (list): A list of dictionaries representing tasks.
+        username_password (dict): A dictionary containing usernames as keys and passwords as values.
+    Returns:    dict: The overall totals and a 'user_stats' dictionary with the totals of each user.
     """
 
 
-    current_date = datetime.today()
+    current_date = datetime.combine(today(), datetime.min.time())
 
-    create_user_file_if_not_found()
-    username_password = create_user_pass_dictionary()
+    assigned = Counter(task['username'] for task in task_list)
+    completed = Counter(task['username'] for task in task_list if task['completed'])
+    overdue = Counter(
+        task['username'] for task in task_list
+        if not task['completed'] and task['due_date'] <= current_date
+    )
 
-    task_data = read_tasks_file()
-    task_list = []
-    total_tasks_completed = 0
-    total_tasks_uncompleted = 0
-    total_tasks_uncompleted_overdue = 0
+    total_tasks = len(task_list)
+    total_tasks_completed = sum(completed.values())
 
     user_stats = {}
 
     for username in username_password:
         user_stats[username] = {
-            'total_tasks_assigned': 0,
-            'total_tasks_completed': 0,
-            'total_tasks_uncompleted': 0,
-            'total_tasks_uncompleted_overdue': 0,
+            'total_tasks_assigned': assigned[username],
+            'total_tasks_completed': completed[username],
+            'total_tasks_uncompleted': assigned[username] - completed[username],
+            'total_tasks_uncompleted_overdue': overdue[username],
         }
 
-    for i, task_components in enumerate(task_data, start=1):
-        curr_t = {
-            'number': i,
-            'username': task_components[1],
-            'title': task_components[2],
-            'description': task_components[3],
-            'due_date': datetime.strptime(task_components[4], DATETIME_STRING_FORMAT),
-            'assigned_date': datetime.strptime(task_components[5], DATETIME_STRING_FORMAT),
-            'completed': task_components[6] == "Yes"
-        }
-        task_list.append(curr_t)
+    return {
+        'total_tasks': total_tasks,
+        'total_tasks_completed': total_tasks_completed,
+        'total_tasks_uncompleted': total_tasks - total_tasks_completed,
+        'total_tasks_uncompleted_overdue': sum(overdue.values()),
+        'user_stats': user_stats,
+    }
 
-        if curr_t['completed']:
-            total_tasks_completed += 1
-            user_stats[curr_t['username']]['total_tasks_completed'] += 1
-        else:
-            total_tasks_uncompleted += 1
-            user_stats[curr_t['username']]['total_tasks_uncompleted'] += 1
-            if curr_t['due_date'] <= current_date:
-                total_tasks_uncompleted_overdue += 1
-                user_stats[curr_t['username']]['total_tasks_uncompleted_overdue'] += 1
 
-        user_stats[curr_t['username']]['total_tasks_assigned'] += 1
+def get_task_statistics(username_password):
+    """
+    Get the task statistics.
+    Returns the cached statistics while no task has been added or edited, no user has been
+    registered and the day has not changed; otherwise calculates them again.
+    Parameters:    username_password (dict): A dictionary containing usernames as keys and passwords as values.
+    Returns:    dict: The statistics calculated by calculate_task_statistics().
+    """
 
-    total_tasks = len(task_list)
+
+    task_list = get_task_list()
+    stats_key = (_TASKS_CACHE["version"], len(username_password), today())
+
+    if _STATS_CACHE["key"] != stats_key:
+        _STATS_CACHE["stats"] = calculate_task_statistics(task_list, username_password)
+        _STATS_CACHE["key"] = stats_key
+
+    return _STATS_CACHE["stats"]
+
+
+def generate_reports_option():
+    """
+    Generate reports.
+    Generates reports based on task data and user statistics.
+    Parameters:    None
+    Returns:    None
+    """
+
+
+    create_user_file_if_not_found()
+    username_password = create_user_pass_dictionary()
+
+    task_stats = get_task_statistics(username_password)
+    total_tasks = task_stats['total_tasks']
+    total_tasks_completed = task_stats['total_tasks_completed']
+    total_tasks_uncompleted = task_stats['total_tasks_uncompleted']
+    total_tasks_uncompleted_overdue = task_stats['total_tasks_uncompleted_overdue']
+    user_stats = task_stats['user_stats']
 
     percentage_tasks_uncompleted = (total_tasks_uncompleted / total_tasks) * 100 if total_tasks > 0 else 0
     percentage_tasks_overdue = (total_tasks_uncompleted_overdue / total_tasks) * 100 if total_tasks > 0 else 0
@@ -695,52 +937,15 @@ def display_stats_option():
     """
 
 
-    current_date = datetime.today()
-
     create_user_file_if_not_found()
     username_password = create_user_pass_dictionary()
 
-    task_data = read_tasks_file()
-    task_list = []
-    total_tasks_completed = 0
-    total_tasks_uncompleted = 0
-    total_tasks_uncompleted_overdue = 0
-
-    user_stats = {}
-
-    for username in username_password:
-        user_stats[username] = {
-            'total_tasks_assigned': 0,
-            'total_tasks_completed': 0,
-            'total_tasks_uncompleted': 0,
-            'total_tasks_uncompleted_overdue': 0,
-        }
-
-    for i, task_components in enumerate(task_data, start=1):
-        curr_t = {
-            'number': i,
-            'username': task_components[1],
-            'title': task_components[2],
-            'description': task_components[3],
-            'due_date': datetime.strptime(task_components[4], DATETIME_STRING_FORMAT),
-            'assigned_date': datetime.strptime(task_components[5], DATETIME_STRING_FORMAT),
-            'completed': task_components[6] == "Yes"
-        }
-        task_list.append(curr_t)
-
-        if curr_t['completed']:
-            total_tasks_completed += 1
-            user_stats[curr_t['username']]['total_tasks_completed'] += 1
-        else:
-            total_tasks_uncompleted += 1
-            user_stats[curr_t['username']]['total_tasks_uncompleted'] += 1
-            if curr_t['due_date'] <= current_date:
-                total_tasks_uncompleted_overdue += 1
-                user_stats[curr_t['username']]['total_tasks_uncompleted_overdue'] += 1
-
-        user_stats[curr_t['username']]['total_tasks_assigned'] += 1
-
-    total_tasks = len(task_list)
+    task_stats = get_task_statistics(username_password)
+    total_tasks = task_stats['total_tasks']
+    total_tasks_completed = task_stats['total_tasks_completed']
+    total_tasks_uncompleted = task_stats['total_tasks_uncompleted']
+    total_tasks_uncompleted_overdue = task_stats['total_tasks_uncompleted_overdue']
+    user_stats = task_stats['user_stats']
 
     percentage_tasks_uncompleted = (total_tasks_uncompleted / total_tasks) * 100 if total_tasks > 0 else 0
     percentage_tasks_overdue = (total_tasks_uncompleted_overdue / total_tasks) * 100 if total_tasks > 0 else 0
@@ -800,96 +1005,201 @@ def display_stats_option():
               f"{int(percentage_assigned_uncompleted_overdue)}%")
 
 
-def main():
+def handle_register(curr_user, state):
     """
-    Main function.
-    The main function of the task management system.
-    Parameters:    None
+    Handle the "r" option.
+    Asks for a new username and registers it.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
     Returns:    None
     """
 
 
-    create_user_file_if_not_found()
-    username_password = create_user_pass_dictionary()
+    new_username = validate_data_entry(input("New Username: "))
+    registration_user_option(new_username, state['username_password'])
+
+
+def handle_add_task(curr_user, state):
+    """
+    Handle the "a" option.
+    Asks for all the details of a new task before validating them together,
+    asks again only for the invalid ones, then adds the task to the task list
+    and appends it to the tasks file.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    None
+    """
 
-    task_data = read_tasks_file()
-    task_list = create_task_list(task_data)
 
-    DATETIME_STRING_FORMAT = "%d-%m-%Y"
+    draft = TaskDraft(**{field: input(prompt) for field, prompt in TASK_DRAFT_PROMPTS.items()})
+    errors, task_due_date = validate_task_draft(draft, state['username_password'])
 
-    user_option = ""
-    edit_specific_task = ""
+    while errors:
+        for _, message in errors:
+            sys.stdout.write(message)
+        for field, _ in errors:
+            setattr(draft, field, input(TASK_DRAFT_PROMPTS[field]))
+        errors, task_due_date = validate_task_draft(draft, state['username_password'])
 
-    while True:
+    curr_date = datetime.combine(today(), datetime.min.time())
 
-        if user_option == "e":
-            break
+    task_list = get_task_list()
+    add_new_task_to_task_list(
+        task_list, draft.username, draft.title, draft.description,
+        task_due_date, curr_date, get_tasks_by_user()
+        )
 
-        print("")
-        separate_line()
-        print("\033[93mPlease LOGIN\033[0m")
-        separate_line()
-        curr_user = validate_data_entry(input("Username: "))
-        curr_pass = validate_data_entry(input("Password: "))
+    append_task_to_file(task_list[-1])
 
-        if initial_loggin(curr_user, curr_pass) is False:
-            print("\033[91mVerify your data and try again.\033[0m")
-            break
 
-        while True:
-            if edit_specific_task != "-1":
-                display_main_menu(curr_user)
+def handle_view_all(curr_user, state):
+    """
+    Handle the "va" option.
+    Displays all tasks.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    None
+    """
+
+
+    view_all_tasks_option(get_task_list())
 
-            user_option = validate_data_entry(input("Select an option from the main menu: ")).lower()
 
-            if user_option == "r":
-                new_username = validate_data_entry(input("New Username: "))
-                registration_user_option(new_username, username_password)
+def handle_view_mine(curr_user, state):
+    """
+    Handle the "vm" option.
+    Displays the tasks of the current user and lets them edit one of them.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    None
+    """
 
-            elif user_option == "a":
-                task_username = input("Name of person assigned to task: ")
-                validated_username = validate_if_username_registered(task_username, username_password)
-                task_title = validate_data_entry(input("Title of Task: "))
-                task_description = validate_data_entry(input("Description of Task: "))
-                task_due_date = validate_due_date_input()
-                curr_date = date.today()
 
-                add_new_task_to_task_list(
-                    task_list, validated_username, task_title, task_description,
-                    task_due_date, curr_date
-                    )
+    view_my_tasks_option(curr_user)
 
-                write_new_task_to_tasks_file(task_list)
+    edit_specific_task = validate_data_entry(input("\nIf you want to access to any of your tasks,"
+                        "Enter the task number, "
+                        "or enter -1 to go back to Main Menu: \n"))
 
-            elif user_option == "va":
-                task_data = read_tasks_file()
-                task_list = create_task_list(task_data)
-                view_all_tasks_option(task_list)
+    if edit_specific_task != "-1":
+        edit_task_details(get_task_list(), curr_user, edit_specific_task)
 
-            elif user_option == "vm":
-                my_task_list = view_my_tasks_option(curr_user)
 
-                edit_specific_task = validate_data_entry(input("\nIf you want to access to any of your tasks,"
-                                    "Enter the task number, "
-                                    "or enter -1 to go back to Main Menu: \n"))
+def handle_reports(curr_user, state):
+    """
+    Handle the "gr" option.
+    Generates the report files.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    None
+    """
 
-                if edit_specific_task == "-1":
-                    display_main_menu(curr_user)
-                else:
-                    edit_task_details(my_task_list, edit_specific_task)
 
-            elif (user_option == "gr") and (curr_user == 'admin'):
-                generate_reports_option()
+    generate_reports_option()
+
+
+def handle_stats(curr_user, state):
+    """
+    Handle the "ds" option.
+    Displays the statistics.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    None
+    """
+
+
+    display_stats_option()
+
+
+def handle_exit(curr_user, state):
+    """
+    Handle the "e" option.
+    Says goodbye; main() saves the pending changes to the tasks file on the way out.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    str: EXIT_SIGNAL, to leave the main menu.
+    """
+
+
+    sys.stdout.write(GOODBYE_MESSAGE)
+    return EXIT_SIGNAL
+
+
+def handle_invalid(curr_user, state):
+    """
+    Handle an unknown option.
+    Parameters:    curr_user (str): The username of the current user.
+        state (dict): The session state shared by the menu handlers.
+    Returns:    None
+    """
+
+
+    sys.stdout.write(INVALID_OPTION_MESSAGE)
+
 
-            elif (user_option == "ds") and (curr_user == 'admin'):
-                display_stats_option()
+EXIT_SIGNAL = "exit"
 
-            elif user_option == "e":
-                print("\033[91mGoodbye!!!\033[0m")
+ADMIN_OPTIONS = {"gr", "ds"}
+
+HANDLERS = {
+    "r":  handle_register,
+    "a":  handle_add_task,
+    "va": handle_view_all,
+    "vm": handle_view_mine,
+    "gr": handle_reports,
+    "ds": handle_stats,
+    "e":  handle_exit,
+}
+
+
+def main():
+    """
+    Main function.
+    The main function of the task management system.
+    Pending task changes are saved however the session ends.
+    Parameters:    None
+    Returns:    None
+    """
+
+
+    create_user_file_if_not_found()
+    state = {'username_password': create_user_pass_dictionary()}
+
+    get_task_list()
+
+    user_option = ""
+
+    try:
+        while True:
+
+            if user_option == "e":
                 break
 
-            else:
-                print("\033[91mInvalid option.\033[0m")
+            print("")
+            separate_line()
+            print("\033[93mPlease LOGIN\033[0m")
+            separate_line()
+            curr_user = validate_data_entry(input("Username: "))
+            curr_pass = validate_data_entry(input("Password: "))
+
+            if initial_loggin(curr_user, curr_pass) is False:
+                print("\033[91mVerify your data and try again.\033[0m")
+                break
+
+            while True:
+                display_main_menu(curr_user)
+
+                user_option = validate_data_entry(input("Select an option from the main menu: ")).lower()
+
+                if user_option in ADMIN_OPTIONS and curr_user != 'admin':
+                    handler = handle_invalid
+                else:
+                    handler = HANDLERS.get(user_option, handle_invalid)
+
+                if handler(curr_user, state) == EXIT_SIGNAL:
+                    break
+    finally:
+        save_tasks_file()
 
 if __name__ == "__main__":
     main()